@@ -45,12 +45,11 @@ async def get_latest(user_id: str, request: Request, sample_type: str = "feature
     if user_id not in app.state.buffers:
         raise HTTPException(404, "User buffer not found")
 
-    # Get all samples, filter by type
-    samples = await app.state.buffers[user_id].get_last_n(1, user_id, sample_type)
-    if not samples:
+    sample = app.state.buffers[user_id].get_latest_typed(user_id, sample_type)
+    if sample is None:
         raise HTTPException(404, "No data in buffer")
 
-    return samples[0]
+    return sample
 
 
 @router.get("/buffer/{user_id}/last/{n}")
@@ -66,7 +65,7 @@ async def get_last_n(user_id: str, n: int, request: Request, sample_type: str =
     if user_id not in app.state.buffers:
         raise HTTPException(404, "User buffer not found")
 
-    return await app.state.buffers[user_id].get_last_n(n, user_id, sample_type)
+    return app.state.buffers[user_id].get_last_n(n, user_id, sample_type)
 
 
 @router.get("/buffer/{user_id}/stats")
@@ -76,18 +75,37 @@ async def get_buffer_stats(user_id: str, request: Request):
     if user_id not in app.state.buffers:
         raise HTTPException(404, "User buffer not found")
 
-    return await app.state.buffers[user_id].get_stats()
+    return app.state.buffers[user_id].get_stats()
+
+
+@router.get("/metrics/per_user")
+async def get_per_user_metrics(request: Request):
+    """Snapshot per-user buffer occupancy.
+
+    Served on demand instead of as Prometheus labels so unbounded user_ids
+    never become label cardinality in the registry.
+    """
+    app = request.app
+    return {
+        user_id: len(buffer)
+        for user_id, buffer in app.state.buffers.items()
+    }
 
 
 @router.get("/stats")
 async def get_stats(request: Request):
-    """Get server statistics."""
+    """Get server statistics.
+
+    The whole payload is assembled as one synchronous snapshot: buffer and
+    connection stats are O(1) reads, so there are no awaits (and no
+    interleaving with handlers) while iterating N user buffers.
+    """
     app = request.app
     return {
         "connections": app.state.connections.get_stats(),
         "persistence": app.state.persistence.get_stats(),
         "buffers": {
-            user_id: await buffer.get_stats()
+            user_id: buffer.get_stats()
             for user_id, buffer in app.state.buffers.items()
         }
     }
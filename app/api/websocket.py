@@ -1,7 +1,6 @@
 """WebSocket endpoints for edge relays and consumers."""
 
 import asyncio
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Optional
@@ -10,9 +9,9 @@ from uuid import UUID
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy import update
 import msgpack  # type: ignore[import-untyped]
+import orjson
 
 from ..core.buffer import StreamBuffer
-from ..core.handlers import handle_features, handle_raw_sample
 from ..core import metrics
 from ..db.models import Session
 from ..config import settings
@@ -64,38 +63,87 @@ async def edge_relay_endpoint(websocket: WebSocket, app):
     # 4. Initialize buffer for this user
     if user_id not in app.state.buffers:
         app.state.buffers[user_id] = StreamBuffer(maxlen=settings.buffer_max_size)
-        metrics.buffer_capacity.labels(user_id=user_id).set(settings.buffer_max_size)
 
-    # 5. Message loop
-    try:
-        while True:
-            # Handle both msgpack (binary) and JSON messages
-            message = await websocket.receive()
-
-            # Check for disconnect message
-            if message.get("type") == "websocket.disconnect":
-                break
-
-            if "bytes" in message:
-                data = msgpack.unpackb(message["bytes"])
-            elif "text" in message:
-                data = json.loads(message["text"])
-            else:
-                continue
+    # Precompute the pub/sub channel names once per connection so the
+    # handlers do a dict lookup instead of an f-string allocation per sample
+    app.state.channels[user_id] = (
+        "user:" + user_id + ":features",
+        "user:" + user_id + ":raw",
+    )
+
+    # Per-connection persistence timestamp clock (last stamped epoch
+    # microseconds): handlers bump it so database timestamps stay unique
+    # per session even when a batched frame drains several samples
+    # within one microsecond
+    app.state.ts_clocks[user_id] = [0]
+
+    # Resolve Prometheus label children once per connection so the handlers
+    # skip the labels() dict lookup + tuple hash on every message
+    app.state.metric_cache[user_id] = {
+        "features_received": metrics.messages_received.labels(message_type="features"),
+        "raw_received": metrics.messages_received.labels(message_type="raw"),
+        "features_processed": metrics.messages_processed.labels(message_type="features"),
+        "raw_processed": metrics.messages_processed.labels(message_type="raw"),
+    }
 
-            msg_type = data.get("type")
-
-            if msg_type == "features":
-                await handle_features(app, user_id, session_id, data)
-
-            elif msg_type == "raw":
-                await handle_raw_sample(app, user_id, session_id, data)
+    # 5. Message loop
+    # Long-lived streaming Unpacker: binary frames are fed into its internal
+    # buffer and decoded in C, avoiding a fresh parser per frame. use_list=False
+    # decodes arrays as tuples, which is cheaper and fine for dict payloads.
+    unpacker = msgpack.Unpacker(
+        raw=False,
+        use_list=False,
+        max_buffer_size=settings.buffer_max_size * 4096,
+    )
+    handlers = app.state.handlers
+
+    async def dispatch(data, raw_bytes):
+        # Dict dispatch: one hash lookup instead of a string-compare chain
+        handler = handlers.get(data.get("type"))
+        if handler is not None:
+            await handler(app, user_id, session_id, data, raw_bytes)
+        else:
+            logger.warning(f"Unknown message type from {user_id}: {data.get('type')}")
 
-            elif msg_type == "heartbeat":
-                await websocket.send_json({"type": "heartbeat_ack"})
+    # Frame format negotiated at auth; edge clients send binary msgpack by
+    # default, which gets a receive_bytes() fast path with no per-frame
+    # dict-shape discrimination. format="json" keeps the mixed legacy loop.
+    msg_format = auth.get("format", "msgpack")
 
-            else:
-                logger.warning(f"Unknown message type from {user_id}: {msg_type}")
+    try:
+        if msg_format == "msgpack":
+            # Binary-only fast path
+            while True:
+                raw = await websocket.receive_bytes()
+                unpacker.feed(raw)
+                datas = list(unpacker)
+                # Only reusable when the frame held exactly one object;
+                # otherwise the bytes span several messages
+                raw_bytes = raw if len(datas) == 1 else None
+                for data in datas:
+                    await dispatch(data, raw_bytes)
+        else:
+            # Legacy loop: handles both msgpack (binary) and JSON messages
+            while True:
+                message = await websocket.receive()
+
+                # Check for disconnect message
+                if message.get("type") == "websocket.disconnect":
+                    break
+
+                if "bytes" in message:
+                    raw = message["bytes"]
+                    unpacker.feed(raw)
+                    datas = list(unpacker)
+                    raw_bytes = raw if len(datas) == 1 else None
+                elif "text" in message:
+                    datas = [orjson.loads(message["text"])]
+                    raw_bytes = None
+                else:
+                    continue
+
+                for data in datas:
+                    await dispatch(data, raw_bytes)
 
     except WebSocketDisconnect:
         logger.info(f"Edge relay disconnected: {user_id}")
@@ -108,6 +156,9 @@ async def edge_relay_endpoint(websocket: WebSocket, app):
         logger.error(f"Error in edge relay connection {user_id}: {e}", exc_info=True)
     finally:
         app.state.connections.disconnect_edge(user_id)
+        app.state.metric_cache.pop(user_id, None)
+        app.state.channels.pop(user_id, None)
+        app.state.ts_clocks.pop(user_id, None)
         metrics.edge_connections.dec()
         metrics.active_sessions.dec()
         metrics.sessions_ended.inc()
@@ -137,21 +188,56 @@ async def consumer_endpoint(websocket: WebSocket, user_id: str, app):
     logger.info(f"Consumer {consumer_id} subscribed to user {user_id}")
 
     try:
-        # Task 1: Forward messages from Redis to consumer
+        # Task 1: Forward messages from Redis to consumer.
+        # Payloads arrive msgpack-encoded from the publisher and are
+        # forwarded without decoding. Instead of waking and writing one WS
+        # frame per pub/sub message, drain whatever is already queued (up
+        # to 64 payloads) and send one binary frame holding a msgpack
+        # array of the raw payloads. Consumers unpack the array and decode
+        # each element.
         async def forward_from_redis():
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    data = msgpack.unpackb(message["data"])
-                    await websocket.send_json(data)
+            while True:
+                msg = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=0.01
+                )
+                if msg is None:
+                    continue
+                batch = [msg["data"]]
+                while len(batch) < 64:
+                    msg = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=0
+                    )
+                    if msg is None:
+                        break
+                    batch.append(msg["data"])
+                await websocket.send_bytes(msgpack.packb(batch))
 
         # Task 2: Receive messages from consumer (predictions/commands/alerts)
+        # Accepts binary msgpack frames (preferred) or JSON text frames.
         async def receive_from_consumer():
             while True:
-                msg = await websocket.receive_json()
-
-                # Forward any message type to edge relay
+                message = await websocket.receive()
+
+                if message.get("type") == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                if "bytes" in message and message["bytes"] is not None:
+                    msg = msgpack.unpackb(message["bytes"], raw=False)
+                elif "text" in message:
+                    msg = orjson.loads(message["text"])
+                else:
+                    continue
+
+                # Forward any message type to edge relay. Consumers may
+                # coalesce several messages into one msgpack array frame
+                # (the test consumer script does); flatten those so edge
+                # clients always receive individual typed messages.
                 # Consumer predictions are NOT stored to database (no session context)
-                await app.state.connections.send_to_edge(user_id, msg)
+                if isinstance(msg, list):
+                    for item in msg:
+                        app.state.connections.send_to_edge(user_id, item)
+                else:
+                    app.state.connections.send_to_edge(user_id, msg)
 
         # Run both tasks concurrently (bidirectional)
         await asyncio.gather(forward_from_redis(), receive_from_consumer())
@@ -24,12 +24,31 @@ class Settings(BaseSettings):
 
     # Buffer
     buffer_max_size: int = 1000
+    max_active_users: int = 1000
 
     # Persistence Configuration
     enable_database_persistence: bool = os.getenv("ENABLE_DB_PERSISTENCE", "true").lower() == "true"
     enable_redis_pubsub: bool = os.getenv("ENABLE_REDIS_PUBSUB", "true").lower() == "true"
+    # Compress broadcast payloads once at publish time (zstd level 1) so the
+    # work is O(1) per sample instead of per-consumer deflate. Compressed
+    # payloads carry a 1-byte "Z" tag to strip and decompress client-side;
+    # with compression off, payloads are plain untagged msgpack. Sniffing is
+    # unambiguous: payloads are msgpack maps, whose first byte (a map
+    # header) can never be "Z".
+    enable_broadcast_compression: bool = os.getenv("ENABLE_BROADCAST_COMPRESSION", "false").lower() == "true"
     batch_size: int = 50
     flush_interval: float = 5.0
 
+    # TimescaleDB chunk sizing. Small chunks keep the active chunk (and its
+    # indexes) resident in shared_buffers; raw samples are far higher volume
+    # than predictions so they get a much shorter interval.
+    raw_chunk_interval: str = os.getenv("RAW_CHUNK_INTERVAL", "1 hour")
+    prediction_chunk_interval: str = os.getenv("PREDICTION_CHUNK_INTERVAL", "1 day")
+
+    # Retention: expired chunks are dropped whole (a metadata operation),
+    # never DELETEd row by row
+    raw_retention_interval: str = os.getenv("RAW_RETENTION_INTERVAL", "30 days")
+    prediction_retention_interval: str = os.getenv("PREDICTION_RETENTION_INTERVAL", "180 days")
+
 
 settings = Settings()
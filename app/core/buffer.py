@@ -1,6 +1,6 @@
 """In-memory buffer for real-time EEG stream data.
 
-Thread-safe circular buffer for storing latest samples from active sessions.
+Circular buffer for storing latest samples from active sessions.
 Enables low-latency real-time queries for MCP tools, dashboards, and consumers.
 
 Supports:
@@ -8,21 +8,47 @@ Supports:
 - Raw EEG samples (channels)
 - Time-range queries
 - Per-user filtering
+
+Storage layout is structure-of-arrays (SoA): fixed-width NumPy ring buffers
+for timestamps and interned user/session/type codes, plus a parallel object
+array for payloads. Compared to a deque of per-sample dicts this keeps the
+hot columns dense in cache and lets filters and range lookups run as
+vectorized masks / searchsorted instead of Python-level list scans.
 """
 
-import asyncio
-from collections import deque
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
 from uuid import UUID
 
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_ns(timestamp: datetime) -> int:
+    """Convert a datetime to integer epoch nanoseconds."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1e9)
+
+
+def _from_ns(ts_ns: int) -> datetime:
+    """Convert integer epoch nanoseconds back to a UTC datetime."""
+    return _EPOCH + timedelta(microseconds=ts_ns // 1000)
+
 
 class StreamBuffer:
-    """Thread-safe circular buffer for real-time stream data.
+    """Circular buffer for real-time stream data.
+
+    Stores the latest N samples for quick access in preallocated NumPy
+    arrays (SoA layout). Strings and UUIDs are interned to small integer
+    codes so per-sample columns stay fixed-width.
 
-    Stores the latest N samples for quick access.
-    Uses collections.deque for O(1) append and automatic size limiting.
-    Thread-safe via asyncio.Lock.
+    Methods are plain synchronous functions: all access happens on the
+    single-threaded event loop and none of them await, so each call is
+    atomic with respect to other coroutines and a lock would only add a
+    future allocation per call.
     """
 
     def __init__(self, maxlen: int = 1000):
@@ -32,12 +58,109 @@ class StreamBuffer:
             maxlen: Maximum number of samples to store (oldest are auto-dropped)
         """
         self.maxlen = maxlen
-        self._buffer: deque = deque(maxlen=maxlen)
-        self._lock = asyncio.Lock()
+        self._timestamps = np.empty(maxlen, dtype=np.int64)   # epoch ns
+        # int32 codes: a buffer outlives connections and interns one
+        # session code per reconnect, so a 16-bit column overflows in
+        # days under a flapping edge; 2**31 codes is out of reach,
+        # and the tables reset whenever the buffer empties anyway
+        self._user_codes = np.empty(maxlen, dtype=np.int32)
+        self._session_codes = np.empty(maxlen, dtype=np.int32)
+        self._type_codes = np.empty(maxlen, dtype=np.uint8)
+        self._data = np.empty(maxlen, dtype=object)
+        self._metadata = np.empty(maxlen, dtype=object)
+        self._head = 0   # next write slot (== oldest slot once full)
+        self._count = 0
+
+        # Interning tables: value -> small int code, and code -> value
+        self._user_code_for: Dict[str, int] = {}
+        self._users: List[str] = []
+        self._session_code_for: Dict[UUID, int] = {}
+        self._sessions: List[str] = []  # str(UUID), computed once per session
+        self._type_code_for: Dict[str, int] = {}
+        self._types: List[str] = []
+
+        # Incremental occupancy counters (code -> live sample count) so
+        # get_stats stays O(1) instead of scanning the ring per call
+        self._user_counts: Counter = Counter()
+        self._session_counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _decrement(counts: Counter, code: int):
+        """Decrement a counter entry, dropping it when it reaches zero."""
+        counts[code] -= 1
+        if counts[code] <= 0:
+            del counts[code]
+
+    def _reset_interning(self):
+        """Drop the interning tables. Only valid while the buffer is empty.
+
+        Called whenever the buffer empties so codes assigned over a
+        buffer's lifetime cannot grow without bound.
+        """
+        self._user_code_for.clear()
+        self._users.clear()
+        self._session_code_for.clear()
+        self._sessions.clear()
+        self._type_code_for.clear()
+        self._types.clear()
+
+    def _intern(self, table: Dict[Any, int], values: list, value: Any) -> int:
+        """Map a value to its small integer code, assigning one if new."""
+        code = table.get(value)
+        if code is None:
+            code = len(values)
+            table[value] = code
+            values.append(value)
+        return code
+
+    def _ordered_indices(self) -> np.ndarray:
+        """Physical indices of live samples in logical (oldest-first) order."""
+        if self._count < self.maxlen:
+            return np.arange(self._count)
+        return np.concatenate(
+            (np.arange(self._head, self.maxlen), np.arange(self._head))
+        )
+
+    def _make_sample(self, i: int) -> Dict[str, Any]:
+        """Materialize the sample dict stored at physical index i."""
+        return {
+            "timestamp": _from_ns(int(self._timestamps[i])),
+            "data": self._data[i],
+            "session_id": self._sessions[self._session_codes[i]],
+            "user_id": self._users[self._user_codes[i]],
+            "sample_type": self._types[self._type_codes[i]],
+            "metadata": self._metadata[i],
+        }
+
+    def _filter_mask(
+        self,
+        ordered: np.ndarray,
+        user_id: Optional[str],
+        sample_type: Optional[str],
+    ) -> Optional[np.ndarray]:
+        """Build a boolean mask over ordered indices for the given filters.
 
-    async def add_sample(
+        Returns None if a filter value was never seen (no possible match).
+        """
+        mask = np.ones(len(ordered), dtype=bool)
+        if user_id is not None:
+            code = self._user_code_for.get(user_id)
+            if code is None:
+                return None
+            mask &= self._user_codes[ordered] == code
+        if sample_type is not None:
+            code = self._type_code_for.get(sample_type)
+            if code is None:
+                return None
+            mask &= self._type_codes[ordered] == code
+        return mask
+
+    def add_sample(
         self,
-        timestamp: datetime,
+        timestamp: "datetime | int",
         data: Any,
         session_id: UUID,
         user_id: str,
@@ -47,7 +170,9 @@ class StreamBuffer:
         """Add a sample to the buffer.
 
         Args:
-            timestamp: Sample timestamp (timezone-aware)
+            timestamp: Sample timestamp - integer epoch nanoseconds
+                (preferred on the hot path, stored as-is) or a
+                timezone-aware datetime
             data: Data to store
                 - "features": Dict with workload, band_powers, metrics
                 - "raw": Dict with channels array
@@ -56,18 +181,34 @@ class StreamBuffer:
             sample_type: Type of data ("features" or "raw")
             metadata: Optional additional metadata
         """
-        async with self._lock:
-            sample = {
-                "timestamp": timestamp,
-                "data": data,
-                "session_id": session_id,
-                "user_id": user_id,
-                "sample_type": sample_type,
-                "metadata": metadata or {},
-            }
-            self._buffer.append(sample)
-
-    async def get_latest(self, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        ts_ns = timestamp if isinstance(timestamp, int) else _to_ns(timestamp)
+        i = self._head
+        if self._count == self.maxlen:
+            # Overwriting the oldest sample: retire its counter entries
+            self._decrement(self._user_counts, int(self._user_codes[i]))
+            self._decrement(self._session_counts, int(self._session_codes[i]))
+
+        user_code = self._intern(self._user_code_for, self._users, user_id)
+        # Sessions intern to their string form: str(UUID) runs once at
+        # session open instead of on every serialized sample
+        session_code = self._session_code_for.get(session_id)
+        if session_code is None:
+            session_code = len(self._sessions)
+            self._session_code_for[session_id] = session_code
+            self._sessions.append(str(session_id))
+        self._timestamps[i] = ts_ns
+        self._user_codes[i] = user_code
+        self._session_codes[i] = session_code
+        self._type_codes[i] = self._intern(self._type_code_for, self._types, sample_type)
+        self._data[i] = data
+        self._metadata[i] = metadata or {}
+        self._user_counts[user_code] += 1
+        self._session_counts[session_code] += 1
+        self._head = (i + 1) % self.maxlen
+        if self._count < self.maxlen:
+            self._count += 1
+
+    def get_latest(self, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get the most recent sample.
 
         Args:
@@ -76,21 +217,55 @@ class StreamBuffer:
         Returns:
             Latest sample dict or None if buffer is empty
         """
-        async with self._lock:
-            if not self._buffer:
-                return None
+        if self._count == 0:
+            return None
 
-            if user_id is None:
-                return self._buffer[-1]
+        if user_id is None:
+            return self._make_sample((self._head - 1) % self.maxlen)
 
-            # Search backwards for latest sample from this user
-            for sample in reversed(self._buffer):
-                if sample["user_id"] == user_id:
-                    return sample
+        code = self._user_code_for.get(user_id)
+        if code is None:
+            return None
 
+        ordered = self._ordered_indices()
+        matches = np.flatnonzero(self._user_codes[ordered] == code)
+        if len(matches) == 0:
             return None
+        return self._make_sample(int(ordered[matches[-1]]))
+
+    def get_latest_typed(
+        self, user_id: str, sample_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get the most recent sample for a user and sample type.
+
+        Single vectorized mask + last-match lookup; avoids the filtered
+        list construction get_last_n(1, ...) would do.
 
-    async def get_last_n(
+        Args:
+            user_id: User identifier
+            sample_type: Sample type ("features" or "raw")
+
+        Returns:
+            Latest matching sample dict or None
+        """
+        if self._count == 0:
+            return None
+
+        user_code = self._user_code_for.get(user_id)
+        type_code = self._type_code_for.get(sample_type)
+        if user_code is None or type_code is None:
+            return None
+
+        ordered = self._ordered_indices()
+        matches = np.flatnonzero(
+            (self._user_codes[ordered] == user_code)
+            & (self._type_codes[ordered] == type_code)
+        )
+        if len(matches) == 0:
+            return None
+        return self._make_sample(int(ordered[matches[-1]]))
+
+    def get_last_n(
         self,
         n: int,
         user_id: Optional[str] = None,
@@ -106,21 +281,19 @@ class StreamBuffer:
         Returns:
             List of sample dicts (newest first)
         """
-        async with self._lock:
-            if not self._buffer:
-                return []
+        if self._count == 0 or n <= 0:
+            return []
 
-            # Filter samples
-            filtered = list(self._buffer)
-            if user_id is not None:
-                filtered = [s for s in filtered if s["user_id"] == user_id]
-            if sample_type is not None:
-                filtered = [s for s in filtered if s["sample_type"] == sample_type]
+        ordered = self._ordered_indices()
+        mask = self._filter_mask(ordered, user_id, sample_type)
+        if mask is None:
+            return []
 
-            # Return last n samples (newest first)
-            return list(reversed(filtered[-n:]))
+        selected = ordered[np.flatnonzero(mask)[-n:]]
+        # Newest first
+        return [self._make_sample(int(i)) for i in selected[::-1]]
 
-    async def get_range(
+    def get_range(
         self,
         start_time: datetime,
         end_time: datetime,
@@ -138,67 +311,162 @@ class StreamBuffer:
         Returns:
             List of samples in time range (oldest first)
         """
-        async with self._lock:
-            if not self._buffer:
-                return []
-
-            samples = []
-            for sample in self._buffer:
-                sample_ts = sample["timestamp"]
-                # Ensure timezone-aware comparison
-                if sample_ts.tzinfo is None:
-                    sample_ts = sample_ts.replace(tzinfo=timezone.utc)
-
-                if start_time <= sample_ts <= end_time:
-                    if user_id is None or sample["user_id"] == user_id:
-                        if sample_type is None or sample["sample_type"] == sample_type:
-                            samples.append(sample)
-
-            return samples
-
-    async def clear(self, user_id: Optional[str] = None):
+        if self._count == 0:
+            return []
+
+        ordered = self._ordered_indices()
+        # Timestamps are append-ordered, so the ordered view is sorted:
+        # binary-search the window instead of scanning every sample.
+        ts = self._timestamps[ordered]
+        lo = int(np.searchsorted(ts, _to_ns(start_time), side="left"))
+        hi = int(np.searchsorted(ts, _to_ns(end_time), side="right"))
+        if lo >= hi:
+            return []
+
+        window = ordered[lo:hi]
+        mask = self._filter_mask(window, user_id, sample_type)
+        if mask is None:
+            return []
+
+        return [self._make_sample(int(i)) for i in window[mask]]
+
+    def clear(self, user_id: Optional[str] = None):
         """Clear the buffer.
 
         Args:
             user_id: Optional - only clear samples for this user
         """
-        async with self._lock:
-            if user_id is None:
-                self._buffer.clear()
-            else:
-                # Remove only samples from this user
-                self._buffer = deque(
-                    (s for s in self._buffer if s["user_id"] != user_id),
-                    maxlen=self.maxlen
-                )
-
-    async def get_stats(self) -> Dict[str, Any]:
+        if user_id is None:
+            self._head = 0
+            self._count = 0
+            self._data[:] = None
+            self._metadata[:] = None
+            self._user_counts.clear()
+            self._session_counts.clear()
+            self._reset_interning()
+            return
+
+        code = self._user_code_for.get(user_id)
+        if code is None:
+            return
+
+        # Compact surviving samples to the front, preserving order
+        ordered = self._ordered_indices()
+        keep = ordered[self._user_codes[ordered] != code]
+        kept = len(keep)
+        for column in (
+            self._timestamps,
+            self._user_codes,
+            self._session_codes,
+            self._type_codes,
+            self._data,
+            self._metadata,
+        ):
+            column[:kept] = column[keep]
+        self._data[kept:] = None
+        self._metadata[kept:] = None
+        self._count = kept
+        self._head = kept % self.maxlen
+        self._user_counts = Counter(self._user_codes[:kept].tolist())
+        self._session_counts = Counter(self._session_codes[:kept].tolist())
+        if kept == 0:
+            self._reset_interning()
+
+    def get_stats(self) -> Dict[str, Any]:
         """Get buffer statistics.
 
         Returns:
             Dictionary with buffer stats (total_samples, unique_users, etc.)
         """
-        async with self._lock:
-            if not self._buffer:
-                return {
-                    "total_samples": 0,
-                    "unique_users": 0,
-                    "unique_sessions": 0,
-                    "oldest_timestamp": None,
-                    "newest_timestamp": None,
-                    "buffer_capacity": self.maxlen,
-                    "buffer_usage_percent": 0,
-                }
-
-            user_ids = set(s["user_id"] for s in self._buffer)
-            session_ids = set(s["session_id"] for s in self._buffer)
-
+        if self._count == 0:
             return {
-                "total_samples": len(self._buffer),
-                "unique_users": len(user_ids),
-                "unique_sessions": len(session_ids),
-                "oldest_timestamp": self._buffer[0]["timestamp"].isoformat(),
-                "newest_timestamp": self._buffer[-1]["timestamp"].isoformat(),
+                "total_samples": 0,
+                "unique_users": 0,
+                "unique_sessions": 0,
+                "oldest_timestamp": None,
+                "newest_timestamp": None,
                 "buffer_capacity": self.maxlen,
-                "buffer_usage_percent": round((len(self._buffer) / self.maxlen) * 100, 2),
+                "buffer_usage_percent": 0,
             }
+
+        oldest = self._head if self._count == self.maxlen else 0
+        newest = (self._head - 1) % self.maxlen
+        return {
+            "total_samples": self._count,
+            "unique_users": len(self._user_counts),
+            "unique_sessions": len(self._session_counts),
+            "oldest_timestamp": _from_ns(int(self._timestamps[oldest])),
+            "newest_timestamp": _from_ns(int(self._timestamps[newest])),
+            "buffer_capacity": self.maxlen,
+            "buffer_usage_percent": round((self._count / self.maxlen) * 100, 2),
+        }
+
+
+class LRUBuffers:
+    """LRU-bounded mapping of user_id -> StreamBuffer.
+
+    A plain dict of buffers never shrinks: every user that ever connected
+    keeps a full ring buffer alive. This map bounds the number of active
+    buffers and evicts the least recently used one in O(1) when the bound
+    is exceeded, invoking an optional callback so metrics and other
+    per-user state can be cleaned up. A can_evict predicate protects
+    entries that must stay alive (users with a live edge connection):
+    protected entries are skipped when choosing a victim, and the map
+    temporarily grows past maxsize rather than evict one.
+
+    Lookups count as use and refresh recency; iteration does not.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        on_evict: Optional[Callable[[str, StreamBuffer], None]] = None,
+        can_evict: Optional[Callable[[str], bool]] = None,
+    ):
+        """Initialize LRU buffer map.
+
+        Args:
+            maxsize: Maximum number of user buffers kept alive
+            on_evict: Called with (user_id, buffer) when an entry is evicted
+            can_evict: Predicate deciding whether an entry may be evicted;
+                entries it rejects are skipped when choosing a victim
+        """
+        self.maxsize = maxsize
+        self._on_evict = on_evict
+        self._can_evict = can_evict
+        self._buffers: "OrderedDict[str, StreamBuffer]" = OrderedDict()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._buffers
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def __getitem__(self, user_id: str) -> StreamBuffer:
+        buffer = self._buffers[user_id]
+        self._buffers.move_to_end(user_id)
+        return buffer
+
+    def __setitem__(self, user_id: str, buffer: StreamBuffer):
+        self._buffers[user_id] = buffer
+        self._buffers.move_to_end(user_id)
+        while len(self._buffers) > self.maxsize:
+            # Oldest evictable entry, in LRU order
+            victim = next(
+                (
+                    uid for uid in self._buffers
+                    if self._can_evict is None or self._can_evict(uid)
+                ),
+                None,
+            )
+            if victim is None:
+                # Every buffer belongs to a live connection: growing past
+                # maxsize beats tearing the state out from under one
+                break
+            evicted = self._buffers.pop(victim)
+            if self._on_evict is not None:
+                self._on_evict(victim, evicted)
+
+    def items(self):
+        """Iterate (user_id, buffer) pairs without refreshing recency."""
+        return self._buffers.items()
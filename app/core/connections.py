@@ -3,66 +3,213 @@
 Industry-standard connection manager pattern for FastAPI WebSockets.
 """
 
+import asyncio
 import logging
-from typing import Dict
+from typing import Dict, Optional, Tuple
+
+import msgpack  # type: ignore[import-untyped]
 from fastapi import WebSocket
 
 logger = logging.getLogger(__name__)
 
+# Maximum messages coalesced into a single outbound WebSocket frame
+SEND_BATCH_SIZE = 64
+
+# Bound on queued outbound messages per connection
+SEND_QUEUE_SIZE = 1024
+
+
+class RedisBatcher:
+    """Coalesces Redis PUBLISH calls into pipelined batches.
+
+    Publishing one sample at a time costs one round-trip per sample; at raw
+    EEG rates this dominates the event loop. Handlers enqueue payloads
+    without awaiting, and a background task drains the queue, sending up to
+    max_batch messages per pipeline flush. Latency stays low when idle
+    because the drain task blocks on the first message and only batches
+    what is already queued behind it.
+    """
+
+    def __init__(self, redis, max_batch: int = 128, max_queue: int = 10_000):
+        """Initialize Redis batcher.
+
+        Args:
+            redis: Async Redis client
+            max_batch: Maximum messages per pipeline flush
+            max_queue: Bound on pending messages (excess are dropped)
+        """
+        self.redis = redis
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[Tuple[str, bytes]] = asyncio.Queue(maxsize=max_queue)
+        self._drain_task: Optional[asyncio.Task] = None
+        self._running = False
+
+    async def start(self):
+        """Start the background drain task."""
+        if self._running:
+            return
+        self._running = True
+        self._drain_task = asyncio.create_task(self._drain())
+        logger.info("RedisBatcher started (max_batch=%d)", self.max_batch)
+
+    async def stop(self):
+        """Stop the drain task and flush anything still queued."""
+        self._running = False
+        if self._drain_task:
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except asyncio.CancelledError:
+                pass
+        await self._flush_pending()
+        logger.info("RedisBatcher stopped")
+
+    def publish(self, channel: str, payload: bytes) -> bool:
+        """Enqueue a payload for publishing (non-blocking).
+
+        Args:
+            channel: Redis channel name
+            payload: Pre-encoded message bytes
+
+        Returns:
+            True if enqueued, False if the queue is full (message dropped)
+        """
+        try:
+            self._queue.put_nowait((channel, payload))
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"RedisBatcher queue full, dropping message for {channel}")
+            return False
+
+    async def _drain(self):
+        """Drain the queue, publishing batches via pipeline."""
+        while self._running:
+            try:
+                batch = [await self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                await self._publish_batch(batch)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in Redis batch publish: {e}", exc_info=True)
+
+    async def _publish_batch(self, batch):
+        """Publish a batch of (channel, payload) pairs in one pipeline."""
+        if len(batch) == 1:
+            channel, payload = batch[0]
+            await self.redis.publish(channel, payload)
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for channel, payload in batch:
+                pipe.publish(channel, payload)
+            await pipe.execute()
+
+    async def _flush_pending(self):
+        """Flush whatever is left in the queue (shutdown path)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if batch:
+            await self._publish_batch(batch)
+
 
 class ConnectionManager:
     """Manages WebSocket connections for edge relays and consumers.
 
     Tracks active connections and provides methods to send messages.
     Handles dead connection cleanup automatically.
+
+    Outbound edge traffic goes through a per-connection send queue drained
+    by a writer task that coalesces pending messages into one binary
+    msgpack frame (an array of messages). This amortizes frame/syscall
+    overhead under bursts instead of writing one WS frame per message.
     """
 
     def __init__(self):
         """Initialize connection manager."""
         self.edges: Dict[str, WebSocket] = {}       # user_id -> edge relay WebSocket
         self.consumers: Dict[str, WebSocket] = {}   # consumer_id -> consumer WebSocket
+        self._edge_queues: Dict[str, asyncio.Queue] = {}
+        self._edge_writers: Dict[str, asyncio.Task] = {}
 
     async def connect_edge(self, user_id: str, websocket: WebSocket):
-        """Register an edge relay connection.
+        """Register an edge relay connection and start its writer task.
 
         Args:
             user_id: User identifier
             websocket: WebSocket connection
         """
         self.edges[user_id] = websocket
+        self._edge_queues[user_id] = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self._edge_writers[user_id] = asyncio.create_task(
+            self._edge_writer(user_id, websocket)
+        )
         logger.info(f"Edge relay connected: {user_id}")
 
     def disconnect_edge(self, user_id: str):
-        """Remove an edge relay connection.
+        """Remove an edge relay connection and stop its writer task.
 
         Args:
             user_id: User identifier
         """
         if user_id in self.edges:
             del self.edges[user_id]
+            self._edge_queues.pop(user_id, None)
+            writer = self._edge_writers.pop(user_id, None)
+            if writer:
+                writer.cancel()
             logger.info(f"Edge relay disconnected: {user_id}")
 
-    async def send_to_edge(self, user_id: str, message: dict) -> bool:
-        """Send message to edge relay.
+    def send_to_edge(self, user_id: str, message: dict) -> bool:
+        """Enqueue a message for the edge relay (non-blocking).
+
+        The per-connection writer task coalesces queued messages and sends
+        them as one binary msgpack frame containing an array of messages.
 
         Args:
             user_id: User identifier
             message: Message to send
 
         Returns:
-            True if sent successfully, False if connection dead
+            True if enqueued, False if connection is gone or queue full
         """
-        if user_id not in self.edges:
+        queue = self._edge_queues.get(user_id)
+        if queue is None:
             return False
 
         try:
-            await self.edges[user_id].send_json(message)
+            queue.put_nowait(message)
             return True
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue full for edge {user_id}, dropping message")
+            return False
+
+    async def _edge_writer(self, user_id: str, websocket: WebSocket):
+        """Drain the send queue for an edge, batching writes into one frame."""
+        queue = self._edge_queues[user_id]
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < SEND_BATCH_SIZE:
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                await websocket.send_bytes(msgpack.packb(batch))
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             logger.warning(f"Failed to send to edge {user_id}: {e}")
             # Dead connection, cleanup
             self.disconnect_edge(user_id)
-            return False
 
     async def connect_consumer(self, consumer_id: str, websocket: WebSocket):
         """Register a consumer connection.
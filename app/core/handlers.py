@@ -1,119 +1,250 @@
-"""Message handlers for edge relay messages."""
+"""Message handlers for edge relay messages.
+
+Handlers are built once at startup by factories that take the enable_*
+settings as arguments (partial evaluation): the returned closures read
+plain local booleans instead of doing two pydantic Settings attribute
+lookups per message, and the dispatch table installed on app.state maps
+message type straight to the right coroutine.
+"""
 
 import logging
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
 import msgpack  # type: ignore[import-untyped]
+import zstandard
 
 from . import metrics
-from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Module-level alias: avoids rebuilding tzinfo lookups per sample
+_UTC = timezone.utc
+_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
 
-async def handle_features(app, user_id: str, session_id: UUID, data: dict):
-    """Process incoming features from edge relay.
 
-    Features are:
-    1. Added to buffer (in-memory for instant queries)
-    2. Published to Redis (broadcast to consumers)
-    3. Queued for database (batched writes)
+def _stamp(clock: list, ts_ns: int) -> datetime:
+    """Unique, monotonic persistence timestamp for one connection.
+
+    Arrival time truncates to microseconds in the database, and draining
+    a batched frame stamps several samples within the same microsecond -
+    duplicates would collide on the composite (timestamp, session_id)
+    primary keys and fail the whole flush batch. Bumping at least one
+    microsecond past the previous stamp keeps arrival-clock semantics
+    while guaranteeing uniqueness per session.
     """
-    timestamp = datetime.now(timezone.utc)
+    ts_us = ts_ns // 1_000
+    if ts_us <= clock[0]:
+        ts_us = clock[0] + 1
+    clock[0] = ts_us
+    return _EPOCH + timedelta(microseconds=ts_us)
 
-    # Track message received
-    metrics.messages_received.labels(message_type="features", user_id=user_id).inc()
 
+def _coerce_channels(channels):
+    """Return channel values as a list of floats, or None if malformed.
+
+    Accepts the typed list shape and the legacy name->value dict shape
+    (older edges and scripts/subscribe_to_stream.py still speak it);
+    anything else cannot be encoded to the float4[] column and would
+    poison the COPY batch it lands in.
+    """
+    if isinstance(channels, dict):
+        channels = channels.values()
+    elif not isinstance(channels, (list, tuple)):
+        return None
     try:
-        # 1. Add to buffer
-        await app.state.buffers[user_id].add_sample(
-            timestamp=timestamp,
-            data=data,
-            session_id=session_id,
-            user_id=user_id,
-            sample_type="features"
-        )
-
-        # Update buffer metrics
-        stats = await app.state.buffers[user_id].get_stats()
-        metrics.buffer_size.labels(user_id=user_id).set(stats["total_samples"])
-
-        # 2. Publish to Redis (broadcast) - optional
-        if settings.enable_redis_pubsub:
-            try:
-                await app.state.redis.publish(
-                    f"user:{user_id}:features",
-                    msgpack.packb(data)
-                )
-            except Exception as e:
-                logger.error(f"Redis publish error: {e}")
+        return [float(v) for v in channels]
+    except (TypeError, ValueError):
+        return None
+
 
-        # 3. Queue for database (batched) - optional
-        if settings.enable_database_persistence:
-            await app.state.persistence.add_prediction(
-                timestamp=timestamp,
+def _make_publish_encoder(enable_compression: bool):
+    """Build the payload encoder used before Redis publish.
+
+    With compression enabled, payloads are zstd-compressed once at publish
+    time and tagged b"Z"; consumers decompress client-side. Fanout to K
+    consumers then costs one compression instead of K per-connection
+    deflates. When disabled, payloads are published untagged msgpack for
+    compatibility with existing subscribers.
+    """
+    if not enable_compression:
+        return lambda payload: payload
+
+    compress = zstandard.ZstdCompressor(level=1).compress
+    return lambda payload: b"Z" + compress(payload)
+
+
+def make_features_handler(
+    enable_pubsub: bool, enable_persistence: bool, enable_compression: bool = False
+):
+    """Build the features handler for the given persistence/pubsub config.
+
+    Features are:
+    1. Added to buffer (in-memory for instant queries)
+    2. Published to Redis (broadcast to consumers), if enabled
+    3. Queued for database (batched writes), if enabled
+    """
+
+    encode_payload = _make_publish_encoder(enable_compression)
+
+    async def handle_features(
+        app, user_id: str, session_id: UUID, data: dict, raw_bytes: bytes | None = None
+    ):
+        """Process incoming features from edge relay.
+
+        When raw_bytes carries the original msgpack frame, it is
+        republished as-is instead of re-encoding the decoded dict.
+        """
+        # Integer nanoseconds: no datetime/tzinfo allocation per sample. A
+        # datetime is only materialized below if database persistence needs it.
+        ts_ns = time.time_ns()
+        metric_cache = app.state.metric_cache[user_id]
+        features_channel, _ = app.state.channels[user_id]
+
+        # Track message received
+        metric_cache["features_received"].inc()
+
+        try:
+            # 1. Add to buffer
+            app.state.buffers[user_id].add_sample(
+                timestamp=ts_ns,
+                data=data,
                 session_id=session_id,
                 user_id=user_id,
-                prediction_type="workload_edge",
-                classifier_name="edge_relay",
-                data=data,
-                confidence=data.get("confidence")
+                sample_type="features"
             )
 
-        # Track successful processing
-        metrics.messages_processed.labels(message_type="features").inc()
+            # 2. Publish to Redis (broadcast, batched)
+            if enable_pubsub:
+                app.state.redis_batcher.publish(
+                    features_channel,
+                    encode_payload(
+                        raw_bytes if raw_bytes is not None else msgpack.packb(data)
+                    )
+                )
+
+            # 3. Queue for database (batched, off the hot path)
+            if enable_persistence:
+                app.state.persistence.put_prediction(
+                    timestamp=_stamp(app.state.ts_clocks[user_id], ts_ns),
+                    session_id=session_id,
+                    user_id=user_id,
+                    prediction_type="workload_edge",
+                    classifier_name="edge_relay",
+                    data=data,
+                    confidence=data.get("confidence")
+                )
+
+            # Track successful processing
+            metric_cache["features_processed"].inc()
 
-    except Exception as e:
-        metrics.messages_failed.labels(message_type="features", error_type=type(e).__name__).inc()
-        raise
+        except Exception as e:
+            metrics.messages_failed.labels(
+                message_type="features", error_type=type(e).__name__
+            ).inc()
+            raise
 
+    return handle_features
 
-async def handle_raw_sample(app, user_id: str, session_id: UUID, data: dict):
-    """Process incoming raw EEG sample from edge relay.
+
+def make_raw_handler(
+    enable_pubsub: bool, enable_persistence: bool, enable_compression: bool = False
+):
+    """Build the raw sample handler for the given persistence/pubsub config.
 
     Raw samples are:
     1. Added to buffer (for visualization/queries)
-    2. Published to Redis (for consumers that need raw EEG)
+    2. Published to Redis (for consumers that need raw EEG), if enabled
     3. Queued for database (if enabled - high volume!)
     """
-    timestamp = datetime.now(timezone.utc)
-
-    # Track message received
-    metrics.messages_received.labels(message_type="raw", user_id=user_id).inc()
 
-    try:
-        # 1. Add to buffer
-        await app.state.buffers[user_id].add_sample(
-            timestamp=timestamp,
-            data=data,
-            session_id=session_id,
-            user_id=user_id,
-            sample_type="raw"
-        )
-
-        # 2. Publish to Redis - optional
-        if settings.enable_redis_pubsub:
-            try:
-                await app.state.redis.publish(
-                    f"user:{user_id}:raw",
-                    msgpack.packb(data)
-                )
-            except Exception as e:
-                logger.error(f"Redis publish error: {e}")
-
-        # 3. Queue for database - optional
-        if settings.enable_database_persistence:
-            await app.state.persistence.add_raw_sample(
-                timestamp=timestamp,
+    encode_payload = _make_publish_encoder(enable_compression)
+
+    async def handle_raw_sample(
+        app, user_id: str, session_id: UUID, data: dict, raw_bytes: bytes | None = None
+    ):
+        """Process incoming raw EEG sample from edge relay.
+
+        When raw_bytes carries the original msgpack frame, it is
+        republished as-is instead of re-encoding the decoded dict.
+        """
+        # Integer nanoseconds: no datetime/tzinfo allocation per sample. A
+        # datetime is only materialized below if database persistence needs it.
+        ts_ns = time.time_ns()
+        metric_cache = app.state.metric_cache[user_id]
+        _, raw_channel = app.state.channels[user_id]
+
+        # Track message received
+        metric_cache["raw_received"].inc()
+
+        try:
+            # 1. Add to buffer
+            app.state.buffers[user_id].add_sample(
+                timestamp=ts_ns,
+                data=data,
                 session_id=session_id,
                 user_id=user_id,
-                data=data
+                sample_type="raw"
             )
 
-        # Track successful processing
-        metrics.messages_processed.labels(message_type="raw").inc()
+            # 2. Publish to Redis (broadcast, batched)
+            if enable_pubsub:
+                app.state.redis_batcher.publish(
+                    raw_channel,
+                    encode_payload(
+                        raw_bytes if raw_bytes is not None else msgpack.packb(data)
+                    )
+                )
 
-    except Exception as e:
-        metrics.messages_failed.labels(message_type="raw", error_type=type(e).__name__).inc()
-        raise
+            # 3. Queue for database (batched, off the hot path). Channels
+            # are validated/coerced here, at the edge of the write path:
+            # a malformed sample is rejected and counted instead of
+            # failing the whole flush batch downstream.
+            if enable_persistence:
+                channels = _coerce_channels(data.get("channels"))
+                if channels is None:
+                    metrics.messages_failed.labels(
+                        message_type="raw", error_type="InvalidChannels"
+                    ).inc()
+                else:
+                    app.state.persistence.put_raw_sample(
+                        timestamp=_stamp(app.state.ts_clocks[user_id], ts_ns),
+                        session_id=session_id,
+                        user_id=user_id,
+                        channels=channels,
+                        sample_number=data.get("sample_number"),
+                    )
+
+            # Track successful processing
+            metric_cache["raw_processed"].inc()
+
+        except Exception as e:
+            metrics.messages_failed.labels(
+                message_type="raw", error_type=type(e).__name__
+            ).inc()
+            raise
+
+    return handle_raw_sample
+
+
+async def handle_heartbeat(
+    app, user_id: str, session_id: UUID, data: dict, raw_bytes: bytes | None = None
+):
+    """Acknowledge an edge relay heartbeat."""
+    app.state.connections.send_to_edge(user_id, {"type": "heartbeat_ack"})
+
+
+def build_handlers(
+    enable_pubsub: bool, enable_persistence: bool, enable_compression: bool = False
+) -> dict:
+    """Build the message-type dispatch table for the given config."""
+    return {
+        "features": make_features_handler(
+            enable_pubsub, enable_persistence, enable_compression
+        ),
+        "raw": make_raw_handler(
+            enable_pubsub, enable_persistence, enable_compression
+        ),
+        "heartbeat": handle_heartbeat,
+    }
@@ -17,10 +17,13 @@ consumer_connections = Gauge(
 )
 
 # Message throughput
+# Note: no user_id label - unbounded identifiers in labels create one child
+# per user forever, bloating the registry and slowing every labels() call.
+# Per-user numbers are served on demand via GET /metrics/per_user.
 messages_received = Counter(
     "messages_received_total",
     "Total number of messages received",
-    ["message_type", "user_id"]
+    ["message_type"]
 )
 
 messages_processed = Counter(
@@ -35,17 +38,15 @@ messages_failed = Counter(
     ["message_type", "error_type"]
 )
 
-# Buffer metrics
+# Buffer metrics (aggregates; per-user counts via GET /metrics/per_user)
 buffer_size = Gauge(
     "buffer_size",
-    "Number of samples in buffer",
-    ["user_id"]
+    "Total number of samples buffered across all users"
 )
 
 buffer_capacity = Gauge(
     "buffer_capacity",
-    "Maximum buffer capacity",
-    ["user_id"]
+    "Total buffer capacity across all users"
 )
 
 # Database persistence
@@ -73,6 +74,12 @@ pending_writes = Gauge(
     ["table"]
 )
 
+persistence_dropped = Counter(
+    "persistence_dropped_total",
+    "Total number of records dropped because the persistence queue was full",
+    ["record_type"]
+)
+
 # Data quality
 sample_latency = Histogram(
     "sample_latency_seconds",
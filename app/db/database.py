@@ -11,28 +11,41 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
 )
+import orjson
 from sqlalchemy import text
 
 from .models import Base
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class DatabaseManager:
-    """Manages database connection pool and sessions."""
+    """Manages database connection pools and sessions.
+
+    Two engines back two distinct workloads so they cannot stall each
+    other: the write engine serves the persistence writer tasks (one
+    connection each, no overflow), while the general engine serves REST
+    queries and session bookkeeping. Size rule: the sum of concurrent
+    DB-touching tasks must stay <= pool_size + max_overflow, or tasks
+    queue on the pool instead of the database.
+    """
 
     def __init__(
         self,
         database_url: str | None = None,
-        pool_size: int = 20,
-        max_overflow: int = 10,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        writer_pool_size: int = 2,
     ):
         """Initialize database manager.
 
         Args:
             database_url: PostgreSQL connection URL
-            pool_size: Connection pool size
+            pool_size: General (REST/session) pool size
             max_overflow: Max connections beyond pool_size
+            writer_pool_size: Dedicated persistence-writer pool size
+                (one connection per writer task)
         """
         self.database_url = database_url or os.getenv("DATABASE_URL")
         if not self.database_url:
@@ -48,12 +61,46 @@ class DatabaseManager:
                 "postgres://", "postgresql+asyncpg://", 1
             )
 
+        # The write workload is two INSERT shapes repeated forever:
+        # large prepared-statement caches make planning a one-time
+        # cost, and JIT off avoids compilation overhead on small
+        # OLTP statements.
+        connect_args = {
+            "statement_cache_size": 1024,
+            "prepared_statement_cache_size": 1024,
+            "server_settings": {"jit": "off"},
+        }
+
+        # orjson (a C extension) handles JSONB (de)serialization; stdlib
+        # json.dumps is pure Python and the dominant serialization cost at
+        # sample rate. Hooking the dialect's own serializer keeps
+        # SQLAlchemy's bind processing in charge, so values are encoded
+        # exactly once on the way to asyncpg's jsonb codec.
+        json_codec_args = {
+            "json_serializer": lambda v: orjson.dumps(v).decode(),
+            "json_deserializer": orjson.loads,
+        }
+
         self.engine: AsyncEngine = create_async_engine(
             self.database_url,
             pool_size=pool_size,
             max_overflow=max_overflow,
             pool_timeout=30.0,
             echo=False,  # Set to True for SQL debugging
+            connect_args=connect_args,
+            **json_codec_args,
+        )
+
+        # Dedicated writer pool: one connection per persistence writer
+        # task, never contended by REST traffic
+        self.write_engine: AsyncEngine = create_async_engine(
+            self.database_url,
+            pool_size=writer_pool_size,
+            max_overflow=0,
+            pool_timeout=30.0,
+            echo=False,
+            connect_args=connect_args,
+            **json_codec_args,
         )
 
         self.session_factory = async_sessionmaker(
@@ -62,6 +109,12 @@ class DatabaseManager:
             expire_on_commit=False,
         )
 
+        self.write_session_factory = async_sessionmaker(
+            self.write_engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+
     async def initialize(self):
         """Initialize database schema and TimescaleDB hypertables."""
         async with self.engine.begin() as conn:
@@ -71,45 +124,125 @@ class DatabaseManager:
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
 
-            # Create hypertables for time-series optimization
-            await conn.execute(text("""
+            # Create hypertables for time-series optimization. Chunk
+            # intervals are sized so the active chunk stays in memory:
+            # raw_samples (~7 KB/s/user) gets hour-sized chunks, predictions
+            # day-sized ones. Both are tunable via settings.
+            await conn.execute(text(f"""
                 SELECT create_hypertable(
                     'predictions',
-                    by_range('timestamp'),
+                    by_range('timestamp', INTERVAL '{settings.prediction_chunk_interval}'),
                     if_not_exists => TRUE
                 );
             """))
 
-            await conn.execute(text("""
+            await conn.execute(text(f"""
                 SELECT create_hypertable(
                     'raw_samples',
-                    by_range('timestamp'),
+                    by_range('timestamp', INTERVAL '{settings.raw_chunk_interval}'),
                     if_not_exists => TRUE
                 );
             """))
 
-            # Create indexes for common queries
+            # Enable columnstore compression on historical chunks.
+            # segmentby carries the columns queries filter on; orderby keeps
+            # each compressed batch time-ordered for fast range scans.
+            # Timescale requires every unique-constraint column to appear
+            # in segmentby or orderby, so each orderby carries the rest of
+            # the table's composite PK after the timestamp.
+            await conn.execute(text("""
+                ALTER TABLE raw_samples SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = 'user_id',
+                    timescaledb.compress_orderby = 'timestamp DESC, session_id'
+                );
+            """))
+
+            await conn.execute(text("""
+                SELECT add_compression_policy(
+                    'raw_samples', INTERVAL '1 day', if_not_exists => TRUE
+                );
+            """))
+
+            await conn.execute(text("""
+                ALTER TABLE predictions SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = 'user_id,prediction_type',
+                    timescaledb.compress_orderby = 'timestamp DESC, session_id, classifier_name'
+                );
+            """))
+
+            await conn.execute(text("""
+                SELECT add_compression_policy(
+                    'predictions', INTERVAL '1 day', if_not_exists => TRUE
+                );
+            """))
+
+            # Retention policies: dropping an expired chunk is a metadata
+            # operation, so old data never costs a row-by-row DELETE
+            await conn.execute(text(f"""
+                SELECT add_retention_policy(
+                    'raw_samples',
+                    INTERVAL '{settings.raw_retention_interval}',
+                    if_not_exists => TRUE
+                );
+            """))
+
+            await conn.execute(text(f"""
+                SELECT add_retention_policy(
+                    'predictions',
+                    INTERVAL '{settings.prediction_retention_interval}',
+                    if_not_exists => TRUE
+                );
+            """))
+
+        # Index creation runs outside the schema transaction on an
+        # AUTOCOMMIT connection. Hypertables reject CREATE INDEX
+        # CONCURRENTLY, so transaction_per_chunk is the Timescale
+        # equivalent: each chunk's index builds in its own transaction,
+        # holding the per-chunk lock briefly instead of locking every
+        # chunk for the whole build.
+        async with self.engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+
             await conn.execute(text("""
                 CREATE INDEX IF NOT EXISTS idx_predictions_session_time
-                ON predictions (session_id, timestamp DESC);
+                ON predictions (session_id, timestamp DESC)
+                WITH (timescaledb.transaction_per_chunk);
             """))
 
             await conn.execute(text("""
                 CREATE INDEX IF NOT EXISTS idx_predictions_user_time
-                ON predictions (user_id, timestamp DESC);
+                ON predictions (user_id, timestamp DESC)
+                WITH (timescaledb.transaction_per_chunk);
             """))
 
+            # "Latest <type> for user X" needs prediction_type leading and a
+            # DESC sort key so the planner answers it with a backward index
+            # scan, no sort step
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_predictions_type_user_time
+                ON predictions (prediction_type, user_id, timestamp DESC)
+                WITH (timescaledb.transaction_per_chunk);
+            """))
+
+            # raw_samples is append-only and range-scan only: a BRIN index
+            # is orders of magnitude smaller than the B-tree and far cheaper
+            # to maintain per insert. predictions keeps B-trees since its
+            # queries are point-ish lookups.
             await conn.execute(text("""
                 CREATE INDEX IF NOT EXISTS idx_raw_samples_user_time
-                ON raw_samples (user_id, timestamp DESC);
+                ON raw_samples USING BRIN (user_id, timestamp)
+                WITH (timescaledb.transaction_per_chunk, pages_per_range = 32);
             """))
 
-            logger.info("Database schema initialized successfully")
+        logger.info("Database schema initialized successfully")
 
     async def close(self):
-        """Close database connection pool."""
+        """Close database connection pools."""
         await self.engine.dispose()
-        logger.info("Database connection pool closed")
+        await self.write_engine.dispose()
+        logger.info("Database connection pools closed")
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
@@ -128,3 +261,20 @@ class DatabaseManager:
                 raise
             finally:
                 await session.close()
+
+    @asynccontextmanager
+    async def get_write_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Get a session on the dedicated writer pool.
+
+        Only the persistence writer tasks should use this; REST traffic
+        belongs on get_session().
+        """
+        async with self.write_session_factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                await session.close()
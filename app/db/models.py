@@ -13,11 +13,12 @@ from sqlalchemy import (
     Column,
     String,
     Float,
-    BigInteger,
     DateTime,
     ForeignKey,
+    Integer,
+    PrimaryKeyConstraint,
 )
-from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, ARRAY, JSONB, REAL
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 
@@ -93,15 +94,25 @@ class Prediction(Base):  # type: ignore[misc,valid-type]
 
     __tablename__ = "predictions"
 
-    timestamp = Column(DateTime(timezone=True), nullable=False, primary_key=True)
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Natural composite key: no sequence in the hot insert path, so batch
+    # inserts never round-trip for nextval(). timestamp + session +
+    # classifier uniquely identifies a prediction.
+    __table_args__ = (
+        PrimaryKeyConstraint("timestamp", "session_id", "classifier_name"),
+    )
+
+    # No single-column indexes: the composite (session_id, timestamp DESC),
+    # (user_id, timestamp DESC) and (prediction_type, user_id, timestamp
+    # DESC) indexes created in DatabaseManager.initialize() cover these
+    # columns as leading keys, and every extra index is paid on insert.
+    timestamp = Column(DateTime(timezone=True), nullable=False)
     session_id = Column(
-        PGUUID(as_uuid=True), ForeignKey("sessions.session_id"), nullable=False, index=True
+        PGUUID(as_uuid=True), ForeignKey("sessions.session_id"), nullable=False
     )
-    user_id = Column(String(100), nullable=False, index=True)  # Denormalized for fast queries
+    user_id = Column(String(100), nullable=False)  # Denormalized for fast queries
 
     # Extensible prediction schema
-    prediction_type = Column(String(50), nullable=False, index=True)
+    prediction_type = Column(String(50), nullable=False)
     classifier_name = Column(String(100), nullable=False)
 
     # Flexible data storage for any prediction schema
@@ -128,34 +139,42 @@ class RawSample(Base):  # type: ignore[misc,valid-type]
     - Offline analysis and research
 
     Metadata (sampling_rate, channel_names) stored in Session.device_info.
-    Samples only store channel values for efficiency.
-
-    Data format:
-    {
-        "channels": [0.1, 0.2, -0.3, 0.15, 0.22, -0.1, 0.3]
-    }
+    Samples only store channel values for efficiency: a typed float4[]
+    (28 bytes packed for 7 channels) instead of a JSONB blob, which also
+    compresses and scans far better under the columnstore.
 
     To get full context, join with Session:
-        SELECT s.data, sess.device_info->>'sampling_rate', sess.device_info->>'channel_names'
+        SELECT s.channels, sess.device_info->>'sampling_rate', sess.device_info->>'channel_names'
         FROM raw_samples s
         JOIN sessions sess ON s.session_id = sess.session_id
         WHERE s.user_id = 'user_123'
 
-    Storage: ~56 bytes per sample (vs ~200 bytes with redundant metadata)
     Volume: ~7 KB/s per user at 128 Hz, 7 channels
     """
 
     __tablename__ = "raw_samples"
 
-    timestamp = Column(DateTime(timezone=True), nullable=False, primary_key=True)
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Natural composite key: the hypertable needs timestamp in the PK.
+    # Handlers stamp persistence timestamps from a per-connection
+    # monotonic microsecond clock, so (timestamp, session_id) is unique
+    # even for samples that arrive in the same batched frame, and no id
+    # sequence is needed (a serial would stall COPY on nextval()).
+    __table_args__ = (
+        PrimaryKeyConstraint("timestamp", "session_id"),
+    )
+
+    timestamp = Column(DateTime(timezone=True), nullable=False)
     session_id = Column(
-        PGUUID(as_uuid=True), ForeignKey("sessions.session_id"), nullable=False, index=True
+        PGUUID(as_uuid=True), ForeignKey("sessions.session_id"), nullable=False
     )
-    user_id = Column(String(100), nullable=False, index=True)  # Denormalized for fast queries
+    # Denormalized for fast queries. No index=True: the BRIN
+    # (user_id, timestamp) index built in DatabaseManager.initialize()
+    # covers user scans at a fraction of a B-tree's per-insert cost.
+    user_id = Column(String(100), nullable=False)
 
     # Raw EEG channel values only (metadata in Session.device_info)
-    data = Column(JSONB, nullable=False)
+    channels = Column(ARRAY(REAL), nullable=False)
+    sample_number = Column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<RawSample {self.timestamp} user={self.user_id}>"
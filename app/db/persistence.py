@@ -6,23 +6,52 @@ Performance: ~1ms per sample (amortized) vs 10-50ms per individual write.
 
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, NamedTuple, Optional
 from uuid import UUID
-from collections import deque
 
+from sqlalchemy import insert, text
+
+from ..core import metrics
 from .models import Prediction, RawSample
 
 logger = logging.getLogger(__name__)
 
 
-class PersistenceManager:
-    """Manages batched writes to database for performance.
+class PredictionRow(NamedTuple):
+    """One predictions row. A slotted tuple, not a ten-key dict per sample."""
+
+    timestamp: datetime
+    session_id: UUID
+    user_id: str
+    prediction_type: str
+    classifier_name: str
+    data: Dict[str, Any]
+    confidence: Optional[float] = None
+    classifier_version: Optional[str] = None
+    processing_time_ms: Optional[float] = None
+
 
-    Flushes when:
-    - Buffer reaches batch_size (default 50)
-    - flush_interval seconds have passed (default 5s)
-    - Graceful shutdown (stop() called)
+class RawSampleRow(NamedTuple):
+    """One raw_samples row; field order matches the COPY column list."""
+
+    timestamp: datetime
+    session_id: UUID
+    user_id: str
+    channels: List[float]
+    sample_number: Optional[int] = None
+
+
+class PersistenceManager:
+    """Batched database writer fed by bounded queues.
+
+    Message handlers enqueue records with put_nowait and return
+    immediately, so a contended or stalled database never backs up the
+    WebSocket receive loop. One writer task per table drains its queue,
+    accumulating up to batch_size records (or whatever arrived within
+    flush_interval) per flush. When a queue is full, records are
+    dropped, counted, and logged at most once per second.
     """
 
     def __init__(
@@ -36,56 +65,65 @@ class PersistenceManager:
         Args:
             db_manager: Database manager instance
             batch_size: Number of records to batch before writing
-            flush_interval: Time in seconds between automatic flushes
+            flush_interval: Max time in seconds a record waits before flush
         """
         self.db = db_manager
         self.batch_size = batch_size
         self.flush_interval = flush_interval
 
-        # Buffers for each table
-        self.prediction_buffer: deque = deque()
-        self.raw_sample_buffer: deque = deque()
+        # Bounded hand-off queues, one per table
+        self.prediction_queue: asyncio.Queue = asyncio.Queue(maxsize=10 * batch_size)
+        self.raw_sample_queue: asyncio.Queue = asyncio.Queue(maxsize=10 * batch_size)
 
-        # Background task for periodic flushing
-        self._flush_task: Optional[asyncio.Task] = None
+        # Size-triggered flush signals: producers set the event once a queue
+        # crosses the watermark, so writers wake for ready batches without
+        # polling and otherwise sleep until their flush deadline
+        self._flush_watermark = max(1, batch_size // 2)
+        self._prediction_event = asyncio.Event()
+        self._raw_sample_event = asyncio.Event()
+
+        # Dedicated writer tasks draining the queues
+        self._writer_tasks: List[asyncio.Task] = []
         self._running = False
+        self._last_drop_log = 0.0
 
     async def start(self):
-        """Start the background flush task."""
+        """Start the writer tasks."""
         if self._running:
             return
 
         self._running = True
-        self._flush_task = asyncio.create_task(self._periodic_flush())
+        self._writer_tasks = [
+            asyncio.create_task(self._drain(
+                self.prediction_queue, self._prediction_event,
+                self.flush_predictions,
+            )),
+            asyncio.create_task(self._drain(
+                self.raw_sample_queue, self._raw_sample_event,
+                self.flush_raw_samples,
+            )),
+        ]
         logger.info("PersistenceManager started (batch_size=%d, interval=%.1fs)",
                    self.batch_size, self.flush_interval)
 
     async def stop(self):
-        """Stop the background flush task and flush remaining data."""
+        """Stop the writer tasks and flush remaining data."""
         self._running = False
-        if self._flush_task:
-            self._flush_task.cancel()
+        for task in self._writer_tasks:
+            task.cancel()
+        for task in self._writer_tasks:
             try:
-                await self._flush_task
+                await task
             except asyncio.CancelledError:
                 pass
+        self._writer_tasks = []
 
-        # Final flush
-        await self.flush_all()
+        # Final flush of anything still queued
+        await self.flush_predictions(self._drain_nowait(self.prediction_queue))
+        await self.flush_raw_samples(self._drain_nowait(self.raw_sample_queue))
         logger.info("PersistenceManager stopped (flushed remaining data)")
 
-    async def _periodic_flush(self):
-        """Periodically flush buffers to database."""
-        while self._running:
-            try:
-                await asyncio.sleep(self.flush_interval)
-                await self.flush_all()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in periodic flush: {e}", exc_info=True)
-
-    async def add_prediction(
+    def put_prediction(
         self,
         timestamp: datetime,
         session_id: UUID,
@@ -96,10 +134,8 @@ class PersistenceManager:
         confidence: Optional[float] = None,
         classifier_version: Optional[str] = None,
         processing_time_ms: Optional[float] = None,
-    ):
-        """Add a prediction to the buffer (features or Azure ML predictions).
-
-        Will auto-flush when batch_size is reached.
+    ) -> bool:
+        """Enqueue a prediction record (non-blocking).
 
         Args:
             timestamp: Prediction timestamp
@@ -111,101 +147,243 @@ class PersistenceManager:
             confidence: Confidence score (optional)
             classifier_version: Classifier version (optional)
             processing_time_ms: Processing time (optional)
-        """
-        prediction = {
-            "timestamp": timestamp,
-            "session_id": session_id,
-            "user_id": user_id,
-            "prediction_type": prediction_type,
-            "classifier_name": classifier_name,
-            "data": data,
-            "confidence": confidence,
-            "classifier_version": classifier_version,
-            "processing_time_ms": processing_time_ms,
-        }
-        self.prediction_buffer.append(prediction)
 
-        if len(self.prediction_buffer) >= self.batch_size:
-            await self.flush_predictions()
-
-    async def add_raw_sample(
+        Returns:
+            True if enqueued, False if the queue was full and it was dropped
+        """
+        return self._put(
+            self.prediction_queue, self._prediction_event, "prediction",
+            PredictionRow(
+                timestamp, session_id, user_id, prediction_type,
+                classifier_name, data, confidence, classifier_version,
+                processing_time_ms,
+            ),
+        )
+
+    def put_raw_sample(
         self,
         timestamp: datetime,
         session_id: UUID,
         user_id: str,
-        data: Dict[str, Any],
-    ):
-        """Add a raw EEG sample to the buffer.
-
-        Will auto-flush when batch_size is reached.
+        channels: List[float],
+        sample_number: Optional[int] = None,
+    ) -> bool:
+        """Enqueue a raw EEG sample record (non-blocking).
 
         Args:
             timestamp: Sample timestamp
             session_id: Session UUID
             user_id: User identifier
-            data: Raw channel data (e.g., {"channels": [0.1, 0.2, ...]})
+            channels: Raw channel values (e.g., [0.1, 0.2, ...])
+            sample_number: Device sample counter (optional)
+
+        Returns:
+            True if enqueued, False if the queue was full and it was dropped
         """
-        sample = {
-            "timestamp": timestamp,
-            "session_id": session_id,
-            "user_id": user_id,
-            "data": data,
-        }
-        self.raw_sample_buffer.append(sample)
+        return self._put(
+            self.raw_sample_queue, self._raw_sample_event, "raw_sample",
+            RawSampleRow(timestamp, session_id, user_id, channels, sample_number),
+        )
+
+    def _put(
+        self,
+        queue: asyncio.Queue,
+        event: asyncio.Event,
+        record_type: str,
+        record: tuple,
+    ) -> bool:
+        try:
+            queue.put_nowait(record)
+            if queue.qsize() >= self._flush_watermark:
+                event.set()
+            return True
+        except asyncio.QueueFull:
+            metrics.persistence_dropped.labels(record_type=record_type).inc()
+            now = time.monotonic()
+            if now - self._last_drop_log >= 1.0:
+                self._last_drop_log = now
+                logger.warning(
+                    "Persistence queue full (%d records), dropping %s records",
+                    queue.maxsize, record_type,
+                )
+            return False
+
+    async def _drain(self, queue: asyncio.Queue, event: asyncio.Event, flush):
+        """Writer loop: flush on the watermark signal or on deadline.
+
+        The deadline follows a fixed monotonic schedule, so a slow flush
+        does not push every subsequent flush later the way a sleep-then-
+        flush chain would.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while self._running:
+            try:
+                await asyncio.wait_for(
+                    event.wait(), timeout=max(0.0, deadline - loop.time())
+                )
+                event.clear()
+            except asyncio.TimeoutError:
+                deadline += self.flush_interval
+                if deadline < loop.time():
+                    # Fell behind (flush slower than interval); re-anchor
+                    deadline = loop.time() + self.flush_interval
+            except asyncio.CancelledError:
+                break
 
-        if len(self.raw_sample_buffer) >= self.batch_size:
-            await self.flush_raw_samples()
+            batch = self._drain_nowait(queue, self.batch_size)
+            try:
+                flushed = await flush(batch)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in persistence writer: {e}", exc_info=True)
+                flushed = False
+
+            if not flushed:
+                # The failed flush requeued its records, which re-crossed
+                # the watermark and re-set the event; clear it so the
+                # retry waits for the next deadline tick instead of
+                # hot-looping full-batch retries against a down database
+                event.clear()
+                continue
+
+            # More than a watermark's worth still queued: go straight into
+            # another flush instead of waiting for the next signal
+            if queue.qsize() >= self._flush_watermark:
+                event.set()
+
+    @staticmethod
+    def _drain_nowait(queue: asyncio.Queue, limit: Optional[int] = None) -> list:
+        """Pull whatever is immediately available off a queue."""
+        records: list = []
+        while limit is None or len(records) < limit:
+            try:
+                records.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return records
 
-    async def flush_predictions(self):
-        """Flush prediction buffer to database."""
-        if not self.prediction_buffer:
-            return
+    async def _write_predictions(self, records: list):
+        """Write prediction records in one executemany round-trip.
+
+        Core insert + executemany: asyncpg prepares one INSERT and
+        streams all rows through it, skipping ORM object construction
+        and per-row unit-of-work bookkeeping.
+        """
+        async with self.db.get_write_session() as session:
+            await session.execute(
+                insert(Prediction), [row._asdict() for row in records]
+            )
+            await session.commit()
+
+    async def _write_raw_samples(self, records: list):
+        """Write raw sample records via COPY.
+
+        Hottest write path (128 Hz per user): drop to the underlying
+        asyncpg connection and use COPY, which moves all rows in one
+        binary round-trip with no INSERT parsing at all. RawSampleRow
+        already is the record tuple, so no per-row conversion at all.
+        """
+        async with self.db.write_engine.begin() as conn:
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.copy_records_to_table(
+                RawSample.__tablename__,
+                records=records,
+                columns=list(RawSampleRow._fields),
+            )
+
+    async def _db_reachable(self) -> bool:
+        """Probe the writer pool with a trivial query."""
+        try:
+            async with self.db.write_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    async def _recover(
+        self,
+        records: list,
+        write,
+        queue: asyncio.Queue,
+        event: asyncio.Event,
+        record_type: str,
+    ) -> bool:
+        """Recover from a failed batch flush.
+
+        If the database is unreachable, the records are requeued and the
+        writer backs off to its next deadline. Otherwise something in the
+        batch itself is unflushable (a value the column type rejects, a
+        broken constraint), so the records are probed one by one: the
+        good ones land and the offenders are dropped and counted.
+        Requeueing a poisoned batch verbatim would fail every retry
+        forever and take healthy records down with it.
+        """
+        if not await self._db_reachable():
+            for record in records:
+                self._put(queue, event, record_type, record)
+            return False
+
+        for record in records:
+            try:
+                await write([record])
+            except Exception as e:
+                metrics.persistence_dropped.labels(record_type=record_type).inc()
+                logger.warning("Dropping unflushable %s record: %s", record_type, e)
+        return True
 
-        records = list(self.prediction_buffer)
-        self.prediction_buffer.clear()
+    async def flush_predictions(self, records: list) -> bool:
+        """Flush a batch of prediction records to database.
+
+        Returns:
+            True unless the database was unreachable and the records
+            were requeued for the next deadline.
+        """
+        if not records:
+            return True
 
         try:
-            async with self.db.get_session() as session:
-                session.add_all([Prediction(**record) for record in records])
-                await session.commit()
+            await self._write_predictions(records)
             logger.debug(f"Flushed {len(records)} predictions to database")
+            return True
         except Exception as e:
             logger.error(f"Error flushing predictions: {e}", exc_info=True)
-            # Re-add to buffer for retry
-            self.prediction_buffer.extend(records)
+            return await self._recover(
+                records, self._write_predictions,
+                self.prediction_queue, self._prediction_event, "prediction",
+            )
 
-    async def flush_raw_samples(self):
-        """Flush raw sample buffer to database."""
-        if not self.raw_sample_buffer:
-            return
+    async def flush_raw_samples(self, records: list) -> bool:
+        """Flush a batch of raw sample records to database.
 
-        records = list(self.raw_sample_buffer)
-        self.raw_sample_buffer.clear()
+        Returns:
+            True unless the database was unreachable and the records
+            were requeued for the next deadline.
+        """
+        if not records:
+            return True
 
         try:
-            async with self.db.get_session() as session:
-                session.add_all([RawSample(**record) for record in records])
-                await session.commit()
+            await self._write_raw_samples(records)
             logger.debug(f"Flushed {len(records)} raw samples to database")
+            return True
         except Exception as e:
             logger.error(f"Error flushing raw samples: {e}", exc_info=True)
-            # Re-add to buffer for retry
-            self.raw_sample_buffer.extend(records)
-
-    async def flush_all(self):
-        """Flush all buffers to database."""
-        await self.flush_predictions()
-        await self.flush_raw_samples()
+            return await self._recover(
+                records, self._write_raw_samples,
+                self.raw_sample_queue, self._raw_sample_event, "raw_sample",
+            )
 
     def get_stats(self) -> Dict[str, Any]:
         """Get persistence manager statistics.
 
         Returns:
-            Dictionary with buffer stats
+            Dictionary with queue stats
         """
         return {
-            "prediction_buffer_size": len(self.prediction_buffer),
-            "raw_sample_buffer_size": len(self.raw_sample_buffer),
+            "prediction_queue_size": self.prediction_queue.qsize(),
+            "raw_sample_queue_size": self.raw_sample_queue.qsize(),
             "batch_size": self.batch_size,
             "flush_interval": self.flush_interval,
             "running": self._running,
@@ -4,24 +4,32 @@ Lightweight bidirectional WebSocket broker for EEG data streams.
 Receives features/raw EEG from edge relays, broadcasts to multiple consumers (MCP, Azure ML, analytics).
 """
 
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from typing import Dict
 
 from fastapi import FastAPI, WebSocket, Response
+from fastapi.responses import ORJSONResponse
 import redis.asyncio as redis
+import uvloop
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from .config import settings
-from .core.connections import ConnectionManager
-from .core.buffer import StreamBuffer
+from .core.connections import ConnectionManager, RedisBatcher
+from .core.handlers import build_handlers
+from .core.buffer import LRUBuffers, StreamBuffer
 from .db.persistence import PersistenceManager
 from .db.database import DatabaseManager
 from .api.rest import router as rest_router
 from .api.websocket import edge_relay_endpoint, consumer_endpoint
 from .core import metrics
 
+# libuv-based event loop: ~2-4x asyncio throughput for the WS/Redis/DB
+# I/O this server is bound by, with no further code changes
+uvloop.install()
+
 # Configure logging
 logging.basicConfig(
     level=settings.log_level,
@@ -43,16 +51,50 @@ async def lifespan(app: FastAPI):
 
     # Initialize services
     app.state.connections = ConnectionManager()
-    buffers: Dict[str, StreamBuffer] = {}
-    app.state.buffers = buffers  # user_id -> StreamBuffer
+
+    def _on_buffer_evict(user_id: str, buffer: StreamBuffer):
+        """Free an evicted buffer."""
+        buffer.clear()
+        logger.info(f"Evicted idle stream buffer for user {user_id}")
+
+    # user_id -> StreamBuffer, LRU-bounded so idle users don't leak
+    # memory. Buffers of users with a live edge connection are never
+    # evicted - handlers index app.state.buffers directly and an evicted
+    # entry would kill that user's connection on the next message.
+    app.state.buffers = LRUBuffers(
+        maxsize=settings.max_active_users,
+        on_evict=_on_buffer_evict,
+        can_evict=lambda user_id: user_id not in app.state.connections.edges,
+    )
+
+    # Aggregate buffer gauges computed at scrape time, not per message.
+    # The set_functions only read plain ints: registry collection runs in
+    # a worker thread (see metrics_endpoint), which must not iterate the
+    # live LRU map while the event loop mutates it, so the sums are
+    # snapshotted on the loop just before rendering is handed off.
+    metrics.buffer_size.set_function(lambda: _buffer_totals["size"])
+    metrics.buffer_capacity.set_function(lambda: _buffer_totals["capacity"])
+    app.state.metric_cache = {}  # user_id -> pre-resolved Prometheus label children
+    app.state.channels = {}  # user_id -> (features channel, raw channel)
+    app.state.ts_clocks = {}  # user_id -> [last stamped epoch microseconds]
+
+    # Message handlers specialized once for the configured pubsub/persistence
+    # combination - no settings reads on the per-message path
+    app.state.handlers = build_handlers(
+        settings.enable_redis_pubsub,
+        settings.enable_database_persistence,
+        settings.enable_broadcast_compression,
+    )
     app.state.redis = await redis.from_url(settings.redis_url)
+    app.state.redis_batcher = RedisBatcher(app.state.redis)
+    await app.state.redis_batcher.start()
     app.state.db = DatabaseManager(settings.database_url)
 
-    # Initialize database schema
-    try:
-        await app.state.db.initialize()
-    except Exception as e:
-        logger.warning(f"Database initialization warning (may already exist): {e}")
+    # Initialize database schema. Every statement in initialize() is
+    # IF NOT EXISTS-idempotent, so any failure here is a real problem
+    # (missing indexes, half-created schema) - fail startup loudly
+    # rather than serving with a broken schema.
+    await app.state.db.initialize()
 
     # Initialize persistence manager
     app.state.persistence = PersistenceManager(
@@ -73,6 +115,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Zander Ingestion Server...")
     await app.state.persistence.stop()
+    await app.state.redis_batcher.stop()
     await app.state.redis.close()
     await app.state.db.close()
     logger.info("Shutdown complete")
@@ -82,20 +125,48 @@ app = FastAPI(
     title="Zander Ingestion Server",
     description="Lightweight bidirectional WebSocket broker for EEG data streams",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes dict-heavy buffer payloads (datetimes, UUIDs included)
+    # several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
-# Initialize Prometheus instrumentation
-Instrumentator().instrument(app).expose(app, endpoint="/metrics")
+# Initialize Prometheus instrumentation (exposition handled below)
+Instrumentator().instrument(app)
 
 # Include REST routes
 app.include_router(rest_router)
 
-
-@app.get("/metrics-custom")
-async def metrics_custom():
-    """Custom metrics endpoint (Prometheus format)."""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+# Rendered exposition payload, refreshed at most once per second so
+# scrape storms serve from cache instead of re-serializing the registry
+_metrics_cache = {"rendered_at": 0.0, "payload": b""}
+
+# Buffer aggregates snapshotted on the event loop per refresh; the gauge
+# set_functions read these from the rendering thread
+_buffer_totals = {"size": 0, "capacity": 0}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics endpoint.
+
+    generate_latest() walks the whole registry and is CPU-bound, so it
+    runs in a thread and its output is cached for a second rather than
+    blocking the event loop on every scrape.
+    """
+    now = time.monotonic()
+    if now - _metrics_cache["rendered_at"] >= 1.0:
+        # Snapshot the buffer sums here, on the event loop, where the
+        # LRU map cannot be mutated mid-iteration
+        size = capacity = 0
+        for _, buf in app.state.buffers.items():
+            size += len(buf)
+            capacity += buf.maxlen
+        _buffer_totals["size"] = size
+        _buffer_totals["capacity"] = capacity
+        _metrics_cache["payload"] = await asyncio.to_thread(generate_latest)
+        _metrics_cache["rendered_at"] = now
+    return Response(_metrics_cache["payload"], media_type=CONTENT_TYPE_LATEST)
 
 
 # WebSocket routes
@@ -113,4 +184,17 @@ async def subscribe_endpoint(websocket: WebSocket, user_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # permessage-deflate off: payloads are compact msgpack (optionally
+    # zstd-compressed once at publish), so per-connection deflate would
+    # burn CPU per consumer for no size win
+    # loop/http/ws pinned explicitly so a missing extra falls back loudly
+    # instead of silently degrading to the stdlib selector loop
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,
+    )
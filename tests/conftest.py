@@ -0,0 +1,8 @@
+"""Shared pytest fixtures and hooks."""
+
+import uvloop
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop, the same loop the server uses."""
+    return {"uvloop": uvloop.new_event_loop}
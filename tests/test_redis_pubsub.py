@@ -1,23 +1,102 @@
 """Tests for Redis pub/sub functionality with edge relay streams."""
 
 import asyncio
+import os
 from datetime import datetime, timezone
 from uuid import uuid4
 
 import msgpack
 import pytest
 import pytest_asyncio
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
 
 from app.config import settings
 
+# One Packer reused by every test: packb builds a fresh Packer per call,
+# which is pure overhead when the payload shape never changes
+PACKER = msgpack.Packer(use_bin_type=True)
 
-@pytest_asyncio.fixture
+# All tests share one session-scoped event loop so the session-scoped
+# Redis fixtures below are usable everywhere
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+@pytest_asyncio.fixture(loop_scope="session", scope="session")
 async def redis_client():
-    """Create Redis client for testing."""
-    client = Redis.from_url(settings.redis_url, decode_responses=False)
+    """Shared Redis client backed by one connection pool.
+
+    Session scope: connect/teardown round-trips are paid once, not per
+    test. Under pytest-xdist each worker lands on its own logical Redis
+    db (gw0 -> 0, gw1 -> 1, ...) so flush-style teardown in one worker
+    can never trample a sibling's keys.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    db = int(worker[2:]) % 16 if worker.startswith("gw") else 0
+    pool = ConnectionPool.from_url(
+        settings.redis_url, max_connections=16, decode_responses=False, db=db
+    )
+    client = Redis(connection_pool=pool)
     yield client
     await client.aclose()
+    await pool.disconnect()
+
+
+@pytest_asyncio.fixture(loop_scope="session", scope="session")
+async def pubsub(redis_client):
+    """One pubsub connection shared by the whole session.
+
+    Tests SUBSCRIBE/UNSUBSCRIBE channels on it rather than opening and
+    closing a socket each; channels are unique per test so there is no
+    cross-talk.
+    """
+    ps = redis_client.pubsub()
+    yield ps
+    await ps.aclose()
+
+
+async def publish_many(client, pairs):
+    """Publish (channel, payload) pairs through one pipeline.
+
+    One socket write/flush for the whole batch instead of one RTT per
+    publish; the same batching production fanout code should use.
+    """
+    async with client.pipeline(transaction=False) as pipe:
+        for channel, payload in pairs:
+            pipe.publish(channel, payload)
+        return await pipe.execute()
+
+
+async def wait_subscribed(pubsub, count: int = 1):
+    """Block until count SUBSCRIBE confirmations have arrived.
+
+    Deterministic replacement for sleep-and-hope guards: it is safe to
+    publish as soon as the server has acknowledged the subscription.
+    """
+    while count:
+        message = await pubsub.get_message(timeout=2.0)
+        if message is not None and message["type"] == "subscribe":
+            count -= 1
+
+
+async def wait_for_message(pubsub, channel: str):
+    """Return the next decoded payload published on channel.
+
+    Polls get_message instead of iterating listen(): no async-iterator
+    wrapper or per-message Task bookkeeping, and subscribe
+    confirmations are filtered by ignore_subscribe_messages rather than
+    a type check per callback. The timeout lives here, in get_message,
+    so callers need no asyncio.wait_for wrapper: a miss returns None
+    instead of cancelling a task mid-await on the pubsub socket.
+    """
+    encoded = channel.encode()
+    while True:
+        message = await pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=2.0
+        )
+        if message is None:
+            return None
+        if message["channel"] == encoded:
+            return msgpack.unpackb(message["data"], raw=False)
 
 
 @pytest.fixture
@@ -26,7 +105,6 @@ def test_user_id():
     return f"test-user-{uuid4().hex[:8]}"
 
 
-@pytest.mark.asyncio
 async def test_redis_connection(redis_client):
     """Test basic Redis connection."""
     # Test ping
@@ -34,7 +112,6 @@ async def test_redis_connection(redis_client):
     assert response is True
 
 
-@pytest.mark.asyncio
 async def test_publish_features_to_redis(redis_client, test_user_id):
     """Test publishing features data to Redis channel."""
     # Test data
@@ -51,17 +128,15 @@ async def test_publish_features_to_redis(redis_client, test_user_id):
 
     # Publish to channel
     channel = f"user:{test_user_id}:features"
-    packed_data = msgpack.packb(features_data)
+    packed_data = PACKER.pack(features_data)
 
     # Publish returns number of subscribers (0 if none listening)
     result = await redis_client.publish(channel, packed_data)
     assert result >= 0  # Should not raise error
 
 
-@pytest.mark.asyncio
-async def test_subscribe_to_features_stream(redis_client, test_user_id):
+async def test_subscribe_to_features_stream(redis_client, pubsub, test_user_id):
     """Test subscribing to and receiving features from Redis channel."""
-    received_data = None
     channel = f"user:{test_user_id}:features"
 
     # Test data
@@ -76,33 +151,17 @@ async def test_subscribe_to_features_stream(redis_client, test_user_id):
         }
     }
 
-    async def subscriber():
-        """Subscribe and wait for message."""
-        nonlocal received_data
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(channel)
+    await pubsub.subscribe(channel)
+    try:
+        await wait_subscribed(pubsub)
 
-        # Wait for subscription confirmation and message
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                received_data = msgpack.unpackb(message["data"], raw=False)
-                break
+        # Publish data
+        packed_data = PACKER.pack(features_data)
+        await redis_client.publish(channel, packed_data)
 
+        received_data = await wait_for_message(pubsub, channel)
+    finally:
         await pubsub.unsubscribe(channel)
-        await pubsub.aclose()
-
-    # Start subscriber
-    subscriber_task = asyncio.create_task(subscriber())
-
-    # Wait a bit for subscription to be ready
-    await asyncio.sleep(0.1)
-
-    # Publish data
-    packed_data = msgpack.packb(features_data)
-    await redis_client.publish(channel, packed_data)
-
-    # Wait for subscriber to receive
-    await asyncio.wait_for(subscriber_task, timeout=2.0)
 
     # Verify received data matches published data
     assert received_data is not None
@@ -111,10 +170,8 @@ async def test_subscribe_to_features_stream(redis_client, test_user_id):
     assert received_data["features"]["alpha"] == features_data["features"]["alpha"]
 
 
-@pytest.mark.asyncio
-async def test_subscribe_to_raw_stream(redis_client, test_user_id):
+async def test_subscribe_to_raw_stream(redis_client, pubsub, test_user_id):
     """Test subscribing to and receiving raw EEG samples from Redis."""
-    received_data = None
     channel = f"user:{test_user_id}:raw"
 
     # Test raw sample data
@@ -129,30 +186,17 @@ async def test_subscribe_to_raw_stream(redis_client, test_user_id):
         "sample_number": 12345
     }
 
-    async def subscriber():
-        """Subscribe and wait for raw sample."""
-        nonlocal received_data
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(channel)
+    await pubsub.subscribe(channel)
+    try:
+        await wait_subscribed(pubsub)
 
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                received_data = msgpack.unpackb(message["data"], raw=False)
-                break
+        # Publish raw sample
+        packed_data = PACKER.pack(raw_data)
+        await redis_client.publish(channel, packed_data)
 
+        received_data = await wait_for_message(pubsub, channel)
+    finally:
         await pubsub.unsubscribe(channel)
-        await pubsub.aclose()
-
-    # Start subscriber
-    subscriber_task = asyncio.create_task(subscriber())
-    await asyncio.sleep(0.1)
-
-    # Publish raw sample
-    packed_data = msgpack.packb(raw_data)
-    await redis_client.publish(channel, packed_data)
-
-    # Wait for subscriber
-    await asyncio.wait_for(subscriber_task, timeout=2.0)
 
     # Verify
     assert received_data is not None
@@ -160,9 +204,13 @@ async def test_subscribe_to_raw_stream(redis_client, test_user_id):
     assert received_data["channels"]["AF7"] == raw_data["channels"]["AF7"]
 
 
-@pytest.mark.asyncio
-async def test_multiple_subscribers(redis_client, test_user_id):
-    """Test multiple subscribers receiving the same message."""
+async def test_multiple_subscribers(redis_client, pubsub, test_user_id):
+    """Test multiple consumers receiving the same message.
+
+    One shared subscription takes delivery, so Redis sends a single copy
+    over a single socket; in-process consumers fan it out from there
+    instead of holding a TCP connection each.
+    """
     received_count = 0
     channel = f"user:{test_user_id}:features"
 
@@ -171,94 +219,63 @@ async def test_multiple_subscribers(redis_client, test_user_id):
         "confidence": 0.75
     }
 
-    async def subscriber(subscriber_id):
-        """Individual subscriber."""
-        nonlocal received_count
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(channel)
+    delivered = asyncio.Event()
+    delivery = {}
 
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                data = msgpack.unpackb(message["data"], raw=False)
-                if data["workload"] == test_data["workload"]:
-                    received_count += 1
-                break
+    async def consumer():
+        """Counter bump driven off the single shared delivery."""
+        nonlocal received_count
+        await delivered.wait()
+        if delivery["data"]["workload"] == test_data["workload"]:
+            received_count += 1
 
-        await pubsub.unsubscribe(channel)
-        await pubsub.aclose()
+    tasks = [asyncio.create_task(consumer()) for _ in range(3)]
 
-    # Start 3 subscribers
-    tasks = [
-        asyncio.create_task(subscriber(i))
-        for i in range(3)
-    ]
+    await pubsub.subscribe(channel)
+    try:
+        await wait_subscribed(pubsub)
 
-    await asyncio.sleep(0.2)
+        # Publish once
+        packed_data = PACKER.pack(test_data)
+        await redis_client.publish(channel, packed_data)
 
-    # Publish once
-    packed_data = msgpack.packb(test_data)
-    await redis_client.publish(channel, packed_data)
+        delivery["data"] = await wait_for_message(pubsub, channel)
+        delivered.set()
+    finally:
+        await pubsub.unsubscribe(channel)
 
-    # Wait for all subscribers
-    await asyncio.gather(*tasks, return_exceptions=True)
+    # Wait for all consumers
+    await asyncio.gather(*tasks)
 
     # All 3 should have received
     assert received_count == 3
 
 
-@pytest.mark.asyncio
-async def test_multiple_user_channels(redis_client):
+async def test_multiple_user_channels(redis_client, pubsub):
     """Test that messages are isolated per user channel."""
     user1_id = f"test-user-{uuid4().hex[:8]}"
     user2_id = f"test-user-{uuid4().hex[:8]}"
 
-    user1_received = None
-    user2_received = None
+    user1_channel = f"user:{user1_id}:features"
+    user2_channel = f"user:{user2_id}:features"
 
     user1_data = {"user": "user1", "value": 100}
     user2_data = {"user": "user2", "value": 200}
 
-    async def subscriber_user1():
-        nonlocal user1_received
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(f"user:{user1_id}:features")
-
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                user1_received = msgpack.unpackb(message["data"], raw=False)
-                break
-
-        await pubsub.aclose()
-
-    async def subscriber_user2():
-        nonlocal user2_received
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(f"user:{user2_id}:features")
-
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                user2_received = msgpack.unpackb(message["data"], raw=False)
-                break
-
-        await pubsub.aclose()
-
-    # Start both subscribers
-    task1 = asyncio.create_task(subscriber_user1())
-    task2 = asyncio.create_task(subscriber_user2())
-    await asyncio.sleep(0.1)
+    await pubsub.subscribe(user1_channel, user2_channel)
+    try:
+        await wait_subscribed(pubsub, count=2)
 
-    # Publish to both channels
-    await redis_client.publish(
-        f"user:{user1_id}:features",
-        msgpack.packb(user1_data)
-    )
-    await redis_client.publish(
-        f"user:{user2_id}:features",
-        msgpack.packb(user2_data)
-    )
+        # Publish to both channels in one round-trip
+        await publish_many(redis_client, [
+            (user1_channel, PACKER.pack(user1_data)),
+            (user2_channel, PACKER.pack(user2_data)),
+        ])
 
-    # Wait for both
-    await asyncio.gather(task1, task2)
+        user1_received = await wait_for_message(pubsub, user1_channel)
+        user2_received = await wait_for_message(pubsub, user2_channel)
+    finally:
+        await pubsub.unsubscribe(user1_channel, user2_channel)
 
     # Verify isolation
     assert user1_received["user"] == "user1"
@@ -267,8 +284,7 @@ async def test_multiple_user_channels(redis_client):
     assert user2_received["value"] == 200
 
 
-@pytest.mark.asyncio
-async def test_msgpack_serialization(redis_client, test_user_id):
+async def test_msgpack_serialization(redis_client, pubsub, test_user_id):
     """Test that complex data structures survive msgpack serialization."""
     channel = f"user:{test_user_id}:features"
 
@@ -288,25 +304,14 @@ async def test_msgpack_serialization(redis_client, test_user_id):
         "floats": [0.1, 0.2, 0.3]
     }
 
-    received_data = None
-
-    async def subscriber():
-        nonlocal received_data
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(channel)
-
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                received_data = msgpack.unpackb(message["data"], raw=False)
-                break
+    await pubsub.subscribe(channel)
+    try:
+        await wait_subscribed(pubsub)
 
-        await pubsub.aclose()
-
-    subscriber_task = asyncio.create_task(subscriber())
-    await asyncio.sleep(0.1)
-
-    await redis_client.publish(channel, msgpack.packb(complex_data))
-    await asyncio.wait_for(subscriber_task, timeout=2.0)
+        await redis_client.publish(channel, PACKER.pack(complex_data))
+        received_data = await wait_for_message(pubsub, channel)
+    finally:
+        await pubsub.unsubscribe(channel)
 
     # Verify complex structure
     assert received_data["session_id"] == complex_data["session_id"]
@@ -316,7 +321,6 @@ async def test_msgpack_serialization(redis_client, test_user_id):
     assert received_data["floats"] == complex_data["floats"]
 
 
-@pytest.mark.asyncio
 async def test_redis_pubsub_disabled(redis_client, test_user_id, monkeypatch):
     """Test that Redis pub/sub can be disabled via settings."""
     # Simulate disabled Redis pub/sub
@@ -0,0 +1,169 @@
+"""Tests for the in-memory StreamBuffer."""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.core.buffer import StreamBuffer
+
+
+def make_timestamp(offset_seconds: float = 0.0) -> datetime:
+    """Build a timezone-aware timestamp offset from a fixed base."""
+    base = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    return base + timedelta(seconds=offset_seconds)
+
+
+def fill_buffer(buffer, n, user_id="user-a", sample_type="features", session_id=None):
+    """Add n sequential samples to the buffer."""
+    session_id = session_id or uuid4()
+    for i in range(n):
+        buffer.add_sample(
+            timestamp=make_timestamp(i),
+            data={"value": i},
+            session_id=session_id,
+            user_id=user_id,
+            sample_type=sample_type,
+        )
+    return session_id
+
+
+def test_empty_buffer():
+    """Empty buffer returns None/empty results."""
+    buffer = StreamBuffer(maxlen=10)
+    assert buffer.get_latest() is None
+    assert buffer.get_last_n(5) == []
+    stats = buffer.get_stats()
+    assert stats["total_samples"] == 0
+    assert stats["oldest_timestamp"] is None
+
+
+def test_add_and_get_latest():
+    """Latest sample round-trips with its fields intact."""
+    buffer = StreamBuffer(maxlen=10)
+    session_id = fill_buffer(buffer, 3)
+
+    latest = buffer.get_latest()
+    assert latest is not None
+    assert latest["data"] == {"value": 2}
+    assert latest["user_id"] == "user-a"
+    assert latest["session_id"] == str(session_id)
+    assert latest["sample_type"] == "features"
+    assert latest["timestamp"] == make_timestamp(2)
+
+
+def test_get_latest_filters_by_user():
+    """get_latest with user_id returns that user's newest sample."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 2, user_id="user-a")
+    fill_buffer(buffer, 1, user_id="user-b")
+
+    latest_a = buffer.get_latest(user_id="user-a")
+    assert latest_a["user_id"] == "user-a"
+    assert latest_a["data"] == {"value": 1}
+
+    assert buffer.get_latest(user_id="unknown") is None
+
+
+def test_get_last_n_newest_first():
+    """get_last_n returns newest-first and respects filters."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 5, sample_type="features")
+    fill_buffer(buffer, 2, sample_type="raw")
+
+    samples = buffer.get_last_n(3, sample_type="features")
+    assert [s["data"]["value"] for s in samples] == [4, 3, 2]
+
+    raw = buffer.get_last_n(10, sample_type="raw")
+    assert len(raw) == 2
+    assert buffer.get_last_n(3, user_id="unknown") == []
+
+
+def test_get_latest_typed():
+    """get_latest_typed returns the newest sample matching user and type."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 3, sample_type="features")
+    fill_buffer(buffer, 2, sample_type="raw")
+
+    latest = buffer.get_latest_typed("user-a", "features")
+    assert latest["data"] == {"value": 2}
+    assert latest["sample_type"] == "features"
+
+    assert buffer.get_latest_typed("user-a", "unknown") is None
+    assert buffer.get_latest_typed("unknown", "features") is None
+
+
+def test_ring_wraparound():
+    """Oldest samples are dropped once maxlen is exceeded."""
+    buffer = StreamBuffer(maxlen=5)
+    fill_buffer(buffer, 8)
+
+    samples = buffer.get_last_n(10)
+    assert len(samples) == 5
+    assert [s["data"]["value"] for s in samples] == [7, 6, 5, 4, 3]
+
+    stats = buffer.get_stats()
+    assert stats["total_samples"] == 5
+    assert stats["oldest_timestamp"] == make_timestamp(3)
+    assert stats["newest_timestamp"] == make_timestamp(7)
+
+
+def test_get_range():
+    """get_range returns samples within the window, oldest first."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 6)
+
+    samples = buffer.get_range(make_timestamp(1), make_timestamp(3))
+    assert [s["data"]["value"] for s in samples] == [1, 2, 3]
+
+    none = buffer.get_range(make_timestamp(100), make_timestamp(200))
+    assert none == []
+
+
+def test_clear_per_user():
+    """Clearing one user keeps the other user's samples in order."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 3, user_id="user-a")
+    fill_buffer(buffer, 2, user_id="user-b")
+
+    buffer.clear(user_id="user-a")
+
+    samples = buffer.get_last_n(10)
+    assert len(samples) == 2
+    assert all(s["user_id"] == "user-b" for s in samples)
+
+    # Buffer keeps accepting samples after compaction
+    fill_buffer(buffer, 1, user_id="user-c")
+    assert buffer.get_latest()["user_id"] == "user-c"
+
+
+def test_interning_resets_when_buffer_empties():
+    """Interning tables are dropped on empty so codes cannot grow forever."""
+    buffer = StreamBuffer(maxlen=10)
+    for _ in range(5):
+        fill_buffer(buffer, 1)  # a distinct session per call
+    assert len(buffer._sessions) == 5
+
+    buffer.clear()
+    assert len(buffer._sessions) == 0
+    assert len(buffer._users) == 0
+
+    # A per-user clear that empties the buffer resets too
+    fill_buffer(buffer, 2, user_id="user-a")
+    buffer.clear(user_id="user-a")
+    assert len(buffer._users) == 0
+
+    # Buffer keeps working with freshly assigned codes
+    fill_buffer(buffer, 1, user_id="user-b")
+    assert buffer.get_latest()["user_id"] == "user-b"
+
+
+def test_stats_unique_counts():
+    """Stats report unique users and sessions currently in the buffer."""
+    buffer = StreamBuffer(maxlen=10)
+    fill_buffer(buffer, 2, user_id="user-a")
+    fill_buffer(buffer, 2, user_id="user-b")
+
+    stats = buffer.get_stats()
+    assert stats["total_samples"] == 4
+    assert stats["unique_users"] == 2
+    assert stats["unique_sessions"] == 2
+    assert stats["buffer_usage_percent"] == 40.0